@@ -8,8 +8,51 @@ This API uses TF-IDF + Logistic Regression to detect whether text is AI-generate
 import json
 import re
 import math
+import hashlib
+import threading
+from collections import Counter, OrderedDict
 from http.server import BaseHTTPRequestHandler
 
+try:
+    import orjson  # Optional: faster JSON encoding when installed
+except ImportError:
+    orjson = None
+
+
+# Precompiled regex patterns used during feature extraction
+_SENT_RE = re.compile(r'[.!?]+')
+_WORD_RE = re.compile(r'\b[a-zA-Z]+\b')
+_CONTRACTION_RE = re.compile(r"\b\w+'[a-z]+\b")
+
+# Byte sets for counting characters with bytes.translate (ASCII-only, so they
+# never collide with multi-byte UTF-8 sequences)
+_PUNCT_BYTES = b'.,!?;:"-()[]{}'
+_CLAUSE_BYTES = b',;:'
+
+# Word categories (lowercase) counted during feature extraction
+_CONJUNCTIONS = frozenset({'and', 'but', 'or', 'so', 'yet', 'for', 'nor', 'although',
+                           'because', 'since', 'while', 'whereas', 'however', 'therefore',
+                           'moreover', 'furthermore', 'additionally', 'consequently'})
+_FIRST_PERSON = frozenset({'i', 'me', 'my', 'mine', 'myself', 'we', 'us', 'our', 'ours', 'ourselves'})
+_PASSIVE_INDICATORS = frozenset({'was', 'were', 'been', 'being', 'is', 'are', 'am'})
+_INFORMAL_MARKERS = frozenset({'gonna', 'wanna', 'kinda', 'sorta', 'yeah', 'yep',
+                               'nope', 'ok', 'okay', 'hey', 'hi', 'well', 'like',
+                               'actually', 'basically', 'literally', 'totally'})
+
+_tanh = math.tanh
+
+
+def _sigmoid(x: float) -> float:
+    """Numerically stable logistic function (never overflows, unlike 1 / (1 + exp(-x)))."""
+    return 0.5 * (1.0 + _tanh(0.5 * x))
+
+
+def _json_bytes(obj) -> bytes:
+    """Serialize obj to JSON bytes, using orjson when it is available."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
 
 # Pre-trained model parameters (simplified for serverless deployment)
 # These coefficients are based on common AI vs Human writing patterns
@@ -28,6 +71,8 @@ class AIDetectorModel:
     8. Sentence complexity (clauses per sentence)
     """
     
+    __slots__ = ('coefficients', 'intercept', '_weights', '_bias')
+    
     def __init__(self):
         # Pre-trained coefficients (learned from AI vs Human text samples)
         # Positive coefficients indicate AI-like features
@@ -44,110 +89,120 @@ class AIDetectorModel:
             'formality_score': 1.2,            # AI tends to be more formal
         }
         self.intercept = 0.4
+        
+        # Normalize features to reasonable ranges: (center, scale)
+        normalization = {
+            'avg_sentence_length': (15, 10),   # Center around 15 words, scale by 10
+            'avg_word_length': (5, 2),         # Center around 5 chars, scale by 2
+            'sentence_complexity': (1, 2),     # Center around 1, scale by 2
+        }
+        # Fold the normalization into the model so predict() is a plain dot product:
+        # coefficient * (value - center) / scale == weight * value + offset
+        weights = []
+        bias = self.intercept
+        for name, coefficient in self.coefficients.items():
+            center, scale = normalization.get(name, (0, 1))
+            weights.append((name, coefficient / scale))
+            bias -= coefficient * center / scale
+        self._weights = tuple(weights)
+        self._bias = bias
     
     def extract_features(self, text: str) -> dict:
         """Extract linguistic features from text."""
         if not text or len(text.strip()) == 0:
             return {}
         
-        # Clean and tokenize
-        sentences = self._split_sentences(text)
-        words = self._tokenize(text)
+        # Encode once so character counts can use C-level bytes.translate
+        encoded = text.encode('utf-8', 'surrogatepass')
+        
+        # Case-fold once up front: bytes.lower() only touches ASCII letters, which
+        # matches str.lower() on [a-zA-Z]+ tokens without moving word boundaries
+        lowered_text = encoded.lower().decode('utf-8', 'surrogatepass')
         
-        if len(words) == 0 or len(sentences) == 0:
+        # Split sentences and tokenize in a single pass
+        sentence_lengths = []
+        words = []
+        for sentence in _SENT_RE.split(lowered_text):
+            if not sentence or sentence.isspace():
+                continue
+            sentence_words = _WORD_RE.findall(sentence)
+            sentence_lengths.append(len(sentence_words))
+            words.extend(sentence_words)
+        
+        word_total = len(words)
+        sentence_total = len(sentence_lengths)
+        if word_total == 0 or sentence_total == 0:
             return {}
         
         features = {}
         
+        # Word frequencies, shared by all word-category counts
+        word_counts = Counter(words)
+        
         # 1. Average sentence length
-        sentence_lengths = [len(self._tokenize(s)) for s in sentences]
-        features['avg_sentence_length'] = sum(sentence_lengths) / len(sentence_lengths) if sentence_lengths else 0
+        features['avg_sentence_length'] = sum(sentence_lengths) / sentence_total
         
         # 2. Vocabulary richness (type-token ratio)
-        unique_words = set(word.lower() for word in words)
-        features['vocabulary_richness'] = len(unique_words) / len(words) if words else 0
+        features['vocabulary_richness'] = len(word_counts) / word_total
         
         # 3. Punctuation density
-        punctuation_count = sum(1 for char in text if char in '.,!?;:"-()[]{}')
-        features['punctuation_density'] = punctuation_count / len(words) if words else 0
+        punctuation_count = len(encoded) - len(encoded.translate(None, _PUNCT_BYTES))
+        features['punctuation_density'] = punctuation_count / word_total
         
         # 4. Conjunction frequency
-        conjunctions = {'and', 'but', 'or', 'so', 'yet', 'for', 'nor', 'although', 
-                       'because', 'since', 'while', 'whereas', 'however', 'therefore',
-                       'moreover', 'furthermore', 'additionally', 'consequently'}
-        conjunction_count = sum(1 for word in words if word.lower() in conjunctions)
-        features['conjunction_freq'] = conjunction_count / len(words) if words else 0
+        conjunction_count = sum(word_counts.get(word, 0) for word in _CONJUNCTIONS)
+        features['conjunction_freq'] = conjunction_count / word_total
         
         # 5. First-person pronoun frequency
-        first_person = {'i', 'me', 'my', 'mine', 'myself', 'we', 'us', 'our', 'ours', 'ourselves'}
-        first_person_count = sum(1 for word in words if word.lower() in first_person)
-        features['first_person_freq'] = first_person_count / len(words) if words else 0
+        first_person_count = sum(word_counts.get(word, 0) for word in _FIRST_PERSON)
+        features['first_person_freq'] = first_person_count / word_total
         
         # 6. Passive voice indicators
-        passive_indicators = {'was', 'were', 'been', 'being', 'is', 'are', 'am'}
-        passive_count = sum(1 for word in words if word.lower() in passive_indicators)
-        features['passive_voice_freq'] = passive_count / len(words) if words else 0
+        passive_count = sum(word_counts.get(word, 0) for word in _PASSIVE_INDICATORS)
+        features['passive_voice_freq'] = passive_count / word_total
         
         # 7. Average word length
-        features['avg_word_length'] = sum(len(word) for word in words) / len(words) if words else 0
+        features['avg_word_length'] = sum(map(len, words)) / word_total
         
         # 8. Sentence complexity (estimated by punctuation within sentences)
-        clause_markers = sum(1 for char in text if char in ',;:')
-        features['sentence_complexity'] = clause_markers / len(sentences) if sentences else 0
+        clause_markers = len(encoded) - len(encoded.translate(None, _CLAUSE_BYTES))
+        features['sentence_complexity'] = clause_markers / sentence_total
         
         # 9. Repetition score (phrase repetition)
         features['repetition_score'] = self._calculate_repetition(words)
         
         # 10. Formality score
-        features['formality_score'] = self._calculate_formality(text, words)
+        features['formality_score'] = self._calculate_formality(text, words, word_counts)
+        
+        # Word count, stashed so predict() does not need to re-tokenize
+        features['_word_count'] = word_total
         
         return features
     
-    def _split_sentences(self, text: str) -> list:
-        """Split text into sentences."""
-        # Simple sentence splitting using regex
-        sentences = re.split(r'[.!?]+', text)
-        return [s.strip() for s in sentences if s.strip()]
-    
-    def _tokenize(self, text: str) -> list:
-        """Tokenize text into words."""
-        # Simple word tokenization
-        words = re.findall(r'\b[a-zA-Z]+\b', text)
-        return words
-    
     def _calculate_repetition(self, words: list) -> float:
-        """Calculate a repetition score based on repeated n-grams."""
+        """Calculate a repetition score based on repeated n-grams of lowercased words."""
         if len(words) < 4:
             return 0.0
         
-        # Check for repeated trigrams
-        trigrams = []
-        for i in range(len(words) - 2):
-            trigram = ' '.join(words[i:i+3]).lower()
-            trigrams.append(trigram)
-        
-        if not trigrams:
-            return 0.0
+        # Check for repeated trigrams (word tuples, no joined strings needed)
+        trigram_count = len(words) - 2
+        unique_trigrams = set(zip(words, words[1:], words[2:]))
         
         # Count repeated trigrams
-        unique_trigrams = set(trigrams)
-        repetition_ratio = 1 - (len(unique_trigrams) / len(trigrams))
+        repetition_ratio = 1 - (len(unique_trigrams) / trigram_count)
         return repetition_ratio
     
-    def _calculate_formality(self, text: str, words: list) -> float:
+    def _calculate_formality(self, text: str, words: list, word_counts: Counter) -> float:
         """Calculate formality score based on contractions and informal words."""
         if not words:
             return 0.5
         
         # Check for contractions (informal)
-        contractions = re.findall(r"\b\w+'[a-z]+\b", text.lower())
+        contractions = _CONTRACTION_RE.findall(text.lower())
         contraction_ratio = len(contractions) / len(words)
         
         # Informal words/phrases
-        informal_markers = {'gonna', 'wanna', 'kinda', 'sorta', 'yeah', 'yep', 
-                          'nope', 'ok', 'okay', 'hey', 'hi', 'well', 'like',
-                          'actually', 'basically', 'literally', 'totally'}
-        informal_count = sum(1 for word in words if word.lower() in informal_markers)
+        informal_count = sum(word_counts.get(word, 0) for word in _INFORMAL_MARKERS)
         informal_ratio = informal_count / len(words)
         
         # Higher formality = less contractions and informal words
@@ -162,6 +217,7 @@ class AIDetectorModel:
             dict with 'prediction' ('AI' or 'Human'), 'confidence', and 'features'
         """
         features = self.extract_features(text)
+        word_count = features.pop('_word_count', 0)
         
         if not features:
             return {
@@ -174,22 +230,12 @@ class AIDetectorModel:
             }
         
         # Calculate logit score
-        logit = self.intercept
-        for feature_name, coefficient in self.coefficients.items():
-            if feature_name in features:
-                # Normalize features to reasonable ranges
-                value = features[feature_name]
-                if feature_name == 'avg_sentence_length':
-                    value = (value - 15) / 10  # Center around 15 words, scale by 10
-                elif feature_name == 'avg_word_length':
-                    value = (value - 5) / 2    # Center around 5 chars, scale by 2
-                elif feature_name == 'sentence_complexity':
-                    value = (value - 1) / 2    # Center around 1, scale by 2
-                
-                logit += coefficient * value
+        logit = self._bias
+        for feature_name, weight in self._weights:
+            logit += weight * features[feature_name]
         
         # Convert logit to probability using sigmoid
-        ai_probability = 1 / (1 + math.exp(-logit))
+        ai_probability = _sigmoid(logit)
         human_probability = 1 - ai_probability
         
         # Make prediction
@@ -203,9 +249,6 @@ class AIDetectorModel:
             prediction = 'Uncertain'
             confidence = max(ai_probability, human_probability)
         
-        # Calculate word count
-        word_count = len(self._tokenize(text))
-        
         return {
             'prediction': prediction,
             'confidence': round(confidence * 100, 1),
@@ -224,10 +267,52 @@ class AIDetectorModel:
 # Initialize model
 detector = AIDetectorModel()
 
+# Warm up the detection and serialization paths during cold start, so the
+# first real request does not pay for it
+try:
+    _json_bytes(detector.predict('warmup ' * 30))
+except Exception:
+    pass
+
+# Input limits: characters required and analysed per text, texts per batch
+# request, and raw request body size (the body limit leaves room for JSON
+# escaping and multi-byte UTF-8)
+MIN_TEXT_LENGTH = 50
+MAX_TEXT_LENGTH = 20000
+MAX_BATCH_SIZE = 100
+MAX_BODY_BYTES = MAX_TEXT_LENGTH * 4 + 1024
+
+# LRU cache of serialized prediction results, keyed by a hash of the input text
+RESULT_CACHE_SIZE = 4096
+_result_cache = OrderedDict()
+_result_cache_lock = threading.Lock()
+
+
+def predict_json(text: str) -> bytes:
+    """Return the JSON-encoded prediction for text, reusing cached results."""
+    key = hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+    with _result_cache_lock:
+        payload = _result_cache.get(key)
+        if payload is not None:
+            _result_cache.move_to_end(key)
+            return payload
+    
+    payload = _json_bytes(detector.predict(text))
+    
+    with _result_cache_lock:
+        _result_cache[key] = payload
+        if len(_result_cache) > RESULT_CACHE_SIZE:
+            _result_cache.popitem(last=False)
+    return payload
+
 
 class handler(BaseHTTPRequestHandler):
     """Vercel Serverless Function Handler"""
     
+    # Buffer self.wfile so headers and the JSON body go out in one write
+    # (flushed by BaseHTTPRequestHandler after each request)
+    wbufsize = 8192
+    
     def do_OPTIONS(self):
         """Handle CORS preflight requests"""
         self.send_response(200)
@@ -249,31 +334,69 @@ class handler(BaseHTTPRequestHandler):
             'usage': 'POST /api/detect with {"text": "your text here"}',
             'reference': 'https://justdone.com/ai-detector'
         }
-        self.wfile.write(json.dumps(response).encode())
+        self.wfile.write(_json_bytes(response))
     
     def do_POST(self):
         """Handle POST requests - perform AI detection"""
         try:
             # Read request body
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length).decode('utf-8')
+            try:
+                content_length = int(self.headers.get('Content-Length', 0))
+            except ValueError:
+                content_length = -1
+            if content_length < 0:
+                self.send_error_response(400, 'Invalid Content-Length header')
+                return
+            if content_length > MAX_BODY_BYTES:
+                self.send_error_response(413, 'Text too long')
+                return
+            body = self.rfile.read(content_length)
             
-            # Parse JSON
+            # Parse JSON (json.loads accepts bytes directly)
             try:
                 data = json.loads(body)
-            except json.JSONDecodeError:
+            except (json.JSONDecodeError, UnicodeDecodeError):
                 self.send_error_response(400, 'Invalid JSON format')
                 return
             
-            # Extract text
-            text = data.get('text', '')
+            too_short = f'Text must be at least {MIN_TEXT_LENGTH} characters long for accurate analysis'
             
-            if not text or len(text.strip()) < 50:
-                self.send_error_response(400, 'Text must be at least 50 characters long for accurate analysis')
-                return
-            
-            # Perform detection
-            result = detector.predict(text)
+            if 'texts' in data:
+                # Batch mode: {"texts": [...]} -> {"results": [...]} in the same order
+                texts = data['texts']
+                if not isinstance(texts, list):
+                    self.send_error_response(400, '"texts" must be a list of strings')
+                    return
+                
+                if not texts or len(texts) > MAX_BATCH_SIZE:
+                    self.send_error_response(400, f'"texts" must contain between 1 and {MAX_BATCH_SIZE} entries')
+                    return
+                
+                for index, text in enumerate(texts):
+                    if not isinstance(text, str):
+                        self.send_error_response(400, f'"texts"[{index}] must be a string')
+                        return
+                    if len(text.strip()) < MIN_TEXT_LENGTH:
+                        self.send_error_response(400, f'"texts"[{index}]: {too_short}')
+                        return
+                
+                # Each text goes through the same cache as single requests, so the
+                # response is assembled from already-serialized results
+                payloads = [predict_json(text[:MAX_TEXT_LENGTH]) for text in texts]
+                result = b'{"results":[' + b','.join(payloads) + b']}'
+            else:
+                # Extract text
+                text = data.get('text', '')
+                
+                if not text or len(text.strip()) < MIN_TEXT_LENGTH:
+                    self.send_error_response(400, too_short)
+                    return
+                
+                # Only the first MAX_TEXT_LENGTH characters are analysed
+                text = text[:MAX_TEXT_LENGTH]
+                
+                # Perform detection (cached by text)
+                result = predict_json(text)
             
             # Send response
             self.send_response(200)
@@ -281,7 +404,7 @@ class handler(BaseHTTPRequestHandler):
             self.send_header('Access-Control-Allow-Origin', '*')
             self.end_headers()
             
-            self.wfile.write(json.dumps(result).encode())
+            self.wfile.write(result)
             
         except Exception as e:
             self.send_error_response(500, f'Internal server error: {str(e)}')
@@ -294,4 +417,4 @@ class handler(BaseHTTPRequestHandler):
         self.end_headers()
         
         response = {'error': message}
-        self.wfile.write(json.dumps(response).encode())
+        self.wfile.write(_json_bytes(response))